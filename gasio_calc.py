@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import io
+from gasio_common import validate_tariffs
 
 # ---------------------------------------------------------
 # 1. 設定 & デザイン
@@ -46,7 +47,7 @@ def solve_unit(df, unit_a):
     for i in range(1, len(sorted_df)):
         prev, curr = sorted_df.iloc[i-1], sorted_df.iloc[i]
         if prev['適用上限(m3)'] != 0:
-            units[curr['No']] = units[prev['No']] - (curr['基本料金(入力)'] - prev['基本料金(入力)']) * prev['適用上限(m3)']
+            units[curr['No']] = units[prev['No']] - (curr['基本料金(入力)'] - prev['基本料金(入力)']) / prev['適用上限(m3)']
         else:
             units[curr['No']] = units[prev['No']]
     return units
@@ -76,39 +77,62 @@ def stabilize_dataframe(df, start_val, mode='fwd'):
         
     return df
 
+def check_column(df, base_col, unit_col):
+    # 編集表に並べる「検証」列（行順は表と同じ）
+    if df.empty: return []
+    chk = pd.DataFrame({'料金表番号': 0, 'MAX': df['適用上限(m3)'].to_numpy(), '基本料金': df[base_col].to_numpy(), '単位料金': df[unit_col].to_numpy()})
+    return validate_tariffs(chk).tolist()
+
 # ---------------------------------------------------------
 # 3. 早見表ジェネレーター ロジック
 # ---------------------------------------------------------
-def calc_bill(usage, df_rates):
-    target = df_rates[df_rates['適用上限(m3)'] >= (usage - 1e-9)]
-    row = target.iloc[0] if not target.empty else df_rates.iloc[-1]
+def calc_bills(usages, df_rates):
+    # 表の並び順で「適用上限 >= 使用量」の最初の区画を適用（超過時は最終区画）
+    usages = np.asarray(usages, dtype=float)
+    limits = df_rates['適用上限(m3)'].to_numpy(dtype=float)
+    hit = limits[None, :] >= (usages[:, None] - 1e-9)
+    idx = np.where(hit.any(axis=1), hit.argmax(axis=1), len(limits) - 1)
     # ガス料金は通常、小数点以下切り捨て
-    return int(row['基本料金'] + (usage * row['調整単位料金']))
+    return (df_rates['基本料金'].to_numpy(dtype=float)[idx] + usages * df_rates['調整単位料金'].to_numpy(dtype=float)[idx]).astype(int)
 
+@st.cache_data(show_spinner=False)
 def generate_hayami_tables(df_rates, adj_rate):
     df = df_rates.copy()
     df['調整単位料金'] = df['単位料金'] + adj_rate
 
     # 表1: 0.0 ~ 40.9 (0.1刻み)
-    t1 = []
-    for i in range(41):
-        r = {"m³": i}
-        for j in range(10):
-            r[f"0.{j}"] = calc_bill(i + j*0.1, df)
-        t1.append(r)
-    
+    rows1 = np.arange(41)
+    grid1 = calc_bills((rows1[:, None] + np.arange(10) * 0.1).ravel(), df).reshape(len(rows1), 10)
+    t1 = pd.DataFrame(grid1, columns=[f"0.{j}" for j in range(10)])
+    t1.insert(0, "m³", rows1)
+
     # 表2: 40 ~ 209 (1.0刻み、10行ごと)
-    t2 = []
-    for i in range(40, 201, 10):
-        r = {"m³": i}
-        for j in range(10):
-            if i == 40 and j == 0:
-                r[str(j)] = np.nan # 40.0は表1にあるため空欄
-            else:
-                r[str(j)] = calc_bill(i + j, df)
-        t2.append(r)
+    rows2 = np.arange(40, 201, 10)
+    grid2 = calc_bills((rows2[:, None] + np.arange(10)).ravel(), df).reshape(len(rows2), 10).astype(float)
+    grid2[0, 0] = np.nan # 40.0は表1にあるため空欄
+    t2 = pd.DataFrame(grid2, columns=[str(j) for j in range(10)])
+    t2.insert(0, "m³", rows2)
 
-    return pd.DataFrame(t1), pd.DataFrame(t2), df
+    return t1, t2, df
+
+@st.cache_data(show_spinner=False)
+def build_hayami_excel(df_adj, df_t1, df_t2):
+    # Excel 出力は入力が変わった時だけ作り直す（再実行ごとの書き出しを回避）
+    output = io.BytesIO()
+    # engine='xlsxwriter' または 'openpyxl' が必要です（多くのStreamlit環境にはどちらか入っています）
+    try:
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            df_adj.to_excel(writer, index=False, sheet_name='1. 適用料金表')
+            df_t1.to_excel(writer, index=False, sheet_name='2. 早見表(0.0-40.9)')
+            df_t2.to_excel(writer, index=False, sheet_name='3. 早見表(40-209)')
+    except (ValueError, ImportError):
+        # xlsxwriterが無い場合は openpyxl でフォールバック
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            df_adj.to_excel(writer, index=False, sheet_name='1. 適用料金表')
+            df_t1.to_excel(writer, index=False, sheet_name='2. 早見表(0.0-40.9)')
+            df_t2.to_excel(writer, index=False, sheet_name='3. 早見表(40-209)')
+    return output.getvalue()
 
 def render_hayami_generator(df_base, base_col, unit_col, tab_key):
     st.markdown("---")
@@ -144,21 +168,7 @@ def render_hayami_generator(df_base, base_col, unit_col, tab_key):
         st.dataframe(df_t2.style.format(fmt2, na_rep="-").hide(axis="index"), use_container_width=True)
 
         # --- Excelダウンロード機能 ---
-        output = io.BytesIO()
-        # engine='xlsxwriter' または 'openpyxl' が必要です（多くのStreamlit環境にはどちらか入っています）
-        try:
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df_adj.to_excel(writer, index=False, sheet_name='1. 適用料金表')
-                df_t1.to_excel(writer, index=False, sheet_name='2. 早見表(0.0-40.9)')
-                df_t2.to_excel(writer, index=False, sheet_name='3. 早見表(40-209)')
-        except ValueError:
-            # xlsxwriterが無い場合は openpyxl でフォールバック
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df_adj.to_excel(writer, index=False, sheet_name='1. 適用料金表')
-                df_t1.to_excel(writer, index=False, sheet_name='2. 早見表(0.0-40.9)')
-                df_t2.to_excel(writer, index=False, sheet_name='3. 早見表(40-209)')
-
-        excel_data = output.getvalue()
+        excel_data = build_hayami_excel(df_adj, df_t1, df_t2)
         
         st.markdown("<br>", unsafe_allow_html=True)
         st.download_button(
@@ -193,19 +203,22 @@ with tab1:
         base_a_fwd = st.number_input("✏️ 第1区画(A) 基本料金", value=float(st.session_state.last_base_a), step=10.0, key="fwd_start")
         current_df = stabilize_dataframe(st.session_state.calc_data, base_a_fwd, mode='fwd')
         
+        view_fwd = current_df[['No', '区画名', '適用上限(m3)', '単位料金(入力)', '基本料金(算出)']].assign(検証=check_column(current_df, '基本料金(算出)', '単位料金(入力)'))
         edited_fwd = st.data_editor(
-            current_df[['No', '区画名', '適用上限(m3)', '単位料金(入力)', '基本料金(算出)']],
+            view_fwd,
             column_config={
                 "No": st.column_config.NumberColumn("🔒 No", disabled=True, width=40),
                 "区画名": st.column_config.TextColumn("🔒 区画", disabled=True, width=60),
                 "適用上限(m3)": st.column_config.NumberColumn("✏️ 適用上限", format="%.1f"),
                 "単位料金(入力)": st.column_config.NumberColumn("✏️ 単位料金", format="%.2f"),
-                "基本料金(算出)": st.column_config.NumberColumn("📊 基本料金(自算)", disabled=True, format="%.2f")
+                "基本料金(算出)": st.column_config.NumberColumn("📊 基本料金(自算)", disabled=True, format="%.2f"),
+                "検証": st.column_config.TextColumn("⚠️ 検証", disabled=True)
             },
             num_rows="dynamic", use_container_width=True, key="editor_fwd"
         )
+        edited_fwd = edited_fwd.drop(columns=['検証'])
         
-        if base_a_fwd != st.session_state.last_base_a or not edited_fwd.equals(current_df[['No', '区画名', '適用上限(m3)', '単位料金(入力)', '基本料金(算出)']]):
+        if base_a_fwd != st.session_state.last_base_a or not edited_fwd.equals(view_fwd.drop(columns=['検証'])):
             st.session_state.last_base_a = base_a_fwd
             st.session_state.calc_data.update(edited_fwd)
             if len(edited_fwd) != len(st.session_state.calc_data):
@@ -237,19 +250,22 @@ with tab2:
         unit_a_rev = st.number_input("✏️ 第1区画(A) 単位料金", value=float(st.session_state.last_unit_a), step=1.0, key="rev_start")
         current_df_rev = stabilize_dataframe(st.session_state.calc_data, unit_a_rev, mode='rev')
         
+        view_rev = current_df_rev[['No', '区画名', '適用上限(m3)', '基本料金(入力)', '単位料金(算出)']].assign(検証=check_column(current_df_rev, '基本料金(入力)', '単位料金(算出)'))
         edited_rev = st.data_editor(
-            current_df_rev[['No', '区画名', '適用上限(m3)', '基本料金(入力)', '単位料金(算出)']],
+            view_rev,
             column_config={
                 "No": st.column_config.NumberColumn("🔒 No", disabled=True, width=40),
                 "区画名": st.column_config.TextColumn("🔒 区画", disabled=True, width=60),
                 "適用上限(m3)": st.column_config.NumberColumn("✏️ 適用上限", format="%.1f"),
                 "基本料金(入力)": st.column_config.NumberColumn("✏️ 基本料金", format="%.2f"),
-                "単位料金(算出)": st.column_config.NumberColumn("📊 単位料金(自算)", disabled=True, format="%.2f")
+                "単位料金(算出)": st.column_config.NumberColumn("📊 単位料金(自算)", disabled=True, format="%.2f"),
+                "検証": st.column_config.TextColumn("⚠️ 検証", disabled=True)
             },
             num_rows="dynamic", use_container_width=True, key="editor_rev"
         )
+        edited_rev = edited_rev.drop(columns=['検証'])
         
-        if unit_a_rev != st.session_state.last_unit_a or not edited_rev.equals(current_df_rev[['No', '区画名', '適用上限(m3)', '基本料金(入力)', '単位料金(算出)']]):
+        if unit_a_rev != st.session_state.last_unit_a or not edited_rev.equals(view_rev.drop(columns=['検証'])):
             st.session_state.last_unit_a = unit_a_rev
             st.session_state.calc_data.update(edited_rev)
             if len(edited_rev) != len(st.session_state.calc_data):
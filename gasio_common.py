@@ -0,0 +1,237 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import io
+import re
+import hashlib
+
+# ---------------------------------------------------------
+# Gasio 各アプリ共通の関数
+# （gasio_simulator.py / gasio_mini.py / gasio_calc.py から import して使う）
+# ---------------------------------------------------------
+
+# ---------------------------------------------------------
+# 1. xlsx マスタ読込
+# ---------------------------------------------------------
+def find_master_header(ws):
+    # 「MIN / MAX / 基本 / 調整単位」が左から並ぶ見出し行を探す（ラベルが揃わない「調整単位」列は対象外）
+    for r_idx, row in enumerate(ws.iter_rows(max_row=200, values_only=True), start=1):
+        labels = ["" if v is None else str(v).strip() for v in row]
+        for j, v in enumerate(labels):
+            if "調整単位" not in v or j < 3: continue
+            if labels[j-3].upper() == "MIN" and labels[j-2].upper() == "MAX" and labels[j-1].startswith("基本"):
+                return r_idx, j + 1
+    return None, None
+
+def read_master_sheet(ws, tariff_id):
+    # 見出し行の MIN/MAX/基本/調整単位 の4列（左隣に区画名があれば5列）だけを空行まで読む
+    header_row, u_col = find_master_header(ws)
+    if header_row is None: return None
+    min_col = u_col - 4 if u_col >= 5 else u_col - 3
+    recs = []
+    for row in ws.iter_rows(min_row=header_row + 1, min_col=min_col, max_col=u_col, values_only=True):
+        if row[-1] is None: break
+        recs.append((row[0] if len(row) == 5 else None,) + tuple(row[-4:]))
+    if not recs: return None
+    df_m = pd.DataFrame(recs, columns=['区画', 'MIN', 'MAX', '基本料金', '単位料金'])
+    for c in ['MIN', 'MAX', '基本料金', '単位料金']: df_m[c] = pd.to_numeric(df_m[c], errors='coerce').astype(float)
+    df_m['MAX'] = df_m['MAX'].fillna(999999999.0)
+    labels = ["ABCDEFGHIJKLMNOPQRSTUVWXYZ"[i] if i < 26 else f"T{i+1}" for i in range(len(df_m))]
+    df_m['区画'] = [str(v).strip() if v is not None and str(v).strip() else l for v, l in zip(df_m['区画'], labels)]
+    df_m['料金表番号'] = tariff_id
+    return df_m[['MIN', 'MAX', '基本料金', '単位料金', '料金表番号', '区画']]
+
+def read_master_xlsx(content):
+    import openpyxl  # xlsx マスタ読込時のみ使用
+    wb = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    try:
+        # 「レートメイク」シートがあればそれだけを読む（無ければ全シートを走査）
+        names = [n for n in wb.sheetnames if "レートメイク" in n] or wb.sheetnames
+        frames = []
+        for k, name in enumerate(names):
+            m = re.search(r'(\d+)$', name)
+            df_m = read_master_sheet(wb[name], int(m.group(1)) if m else 10 + k)
+            if df_m is not None: frames.append(df_m)
+    finally:
+        wb.close()
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+# 解析結果はディスクにも保存し、プロセス再起動・再デプロイ後も再解析しない
+@st.cache_data(show_spinner=False, max_entries=16, persist="disk")
+def load_master_xlsx_cached(file_hash, _content):
+    return read_master_xlsx(_content)
+
+def load_master_xlsx(file):
+    file.seek(0)
+    content = file.read()
+    return load_master_xlsx_cached(hashlib.sha256(content).hexdigest(), content)
+
+# ---------------------------------------------------------
+# 2. デモデータ
+# ---------------------------------------------------------
+@st.cache_data(show_spinner=False, persist="disk")
+def load_demo_data():
+    # デモ用マスタ
+    df_m = pd.DataFrame({
+        'MIN': [0.0, 8.0, 30.0], 'MAX': [8.0, 30.0, 999999999.0],
+        '基本料金': [1800.0, 2600.0, 5600.0], '単位料金': [550.0, 450.0, 350.0],
+        '料金表番号': [99, 99, 99], '区画': ['A', 'B', 'C']
+    })
+    # デモ用使用量（ガンマ分布を使って、リアルなガス使用量の偏りを再現）
+    demo_usages = np.round(np.random.RandomState(42).gamma(shape=2.5, scale=6.0, size=800), 1)
+    df_u = pd.DataFrame({'使用量': demo_usages, '調定数': 1, '料金表番号': 99})
+    return df_m, df_u
+
+# ---------------------------------------------------------
+# 3. 料金表の整合性チェック
+# ---------------------------------------------------------
+def validate_tariffs(df_all, max_usage=None):
+    # 全料金表を1つの表として受け取り、料金表番号ごとに前区画と比較して一括検証（行順 = 区画順）
+    # max_usage（料金表番号 -> 最大使用量 の dict、または全体の値）を省略した場合はカバー範囲を検証しない
+    d = df_all.rename(columns={'適用上限(m3)':'MAX'}).reset_index(drop=True)
+    v = pd.DataFrame({'key': d['料金表番号'], 'mx': pd.to_numeric(d['MAX'], errors='coerce'),
+                      'base': pd.to_numeric(d['基本料金'], errors='coerce'), 'unit': pd.to_numeric(d['単位料金'], errors='coerce')})
+    g = v.groupby('key', sort=False)
+    p_mx, p_base, p_unit = g['mx'].shift(), g['base'].shift(), g['unit'].shift()
+    is_last = g.cumcount(ascending=False) == 0
+    cover = v['key'].map(max_usage) if isinstance(max_usage, dict) else pd.Series(max_usage, index=v.index, dtype=float)
+    # 境界 (前区画の上限) での新旧区画の料金差
+    gap = (p_base + p_mx * p_unit) - (v['base'] + p_mx * v['unit'])
+    checks = [
+        ('上限が昇順でない', p_mx.notna() & (v['mx'] <= p_mx)),
+        ('単位料金が上昇', p_unit.notna() & (v['unit'] > p_unit + 1e-9)),
+        ('境界で料金が不連続', gap.abs() >= 1.0),
+        ('料金が負または未入力', ~(v['base'] >= 0) | ~(v['unit'] >= 0) | v['mx'].isna()),
+        ('最大使用量を未カバー', is_last & (v['mx'] < cover)),
+    ]
+    msgs = pd.Series('', index=v.index)
+    for label, mask in checks:
+        msgs = msgs.mask(mask.to_numpy(), msgs + ' / ' + label)
+    return msgs.str[3:]
+
+# ---------------------------------------------------------
+# 4. 区画判定・集計
+# ---------------------------------------------------------
+def assign_tiers(df_usage, df_master):
+    # 各行を「自分の料金表番号」のマスタで区画判定（merge_asof で全料金表を1回で処理）
+    # 料金表番号はマスタ・使用量で共通の factorize コードに置換（文字列IDも 10 / 10.0 の混在もそのまま一致させる）
+    codes, _ = pd.factorize(pd.concat([df_master['料金表番号'], df_usage['料金表番号']], ignore_index=True))
+    m_codes, u_codes = codes[:len(df_master)].astype(np.int64), codes[len(df_master):].astype(np.int64)
+    m = df_master.copy()
+    m['_tid'] = m_codes
+    m['MAX'] = pd.to_numeric(m['MAX'], errors='coerce').fillna(999999999.0).astype(np.float64)
+    m = m.sort_values(['_tid', 'MAX'], kind='stable').reset_index(drop=True)
+    m['区画順'] = m.groupby('_tid').cumcount() + 1
+    name = pd.Series(np.nan, index=m.index, dtype=object)
+    for col in ['区画名', '区画']:
+        if col in m.columns: name = name.fillna(m[col].where(m[col].notna() & (m[col].astype(str).str.strip() != '')))
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    m['区画'] = name.where(name.notna(), m['区画順'].map(lambda r: letters[r-1] if r <= len(letters) else f"Tier{r}")).astype(str)
+    m = m[['_tid', 'MAX', '区画順', '区画']]
+
+    # 料金表番号が欠損の行 (-1) はどのマスタにも一致させない
+    u = pd.DataFrame({'_pos': np.arange(len(df_usage)), '_tid': np.where(u_codes < 0, -2, u_codes),
+                      '_key': pd.to_numeric(df_usage['使用量'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64) - 1e-9})
+    hit = pd.merge_asof(u.sort_values('_key'), m.sort_values('MAX', kind='stable'), left_on='_key', right_on='MAX', by='_tid', direction='forward').sort_values('_pos')
+    # 最終区画の上限を超える使用量は最終区画、マスタの無い料金表番号は Unknown
+    last = m.groupby('_tid').tail(1).set_index('_tid')
+    over = hit['区画'].isna() & hit['_tid'].isin(last.index)
+    hit.loc[over, '区画順'] = hit.loc[over, '_tid'].map(last['区画順'])
+    hit.loc[over, '区画'] = hit.loc[over, '_tid'].map(last['区画'])
+    return pd.DataFrame({'区画順': hit['区画順'].fillna(99).astype(int).to_numpy(), '区画': hit['区画'].fillna('Unknown').to_numpy()}, index=df_usage.index)
+
+def aggregate_tiers(df_usage, tiers):
+    # 料金表番号 × 区画 の集計と、料金表番号内の構成比
+    d = df_usage[['料金表番号', '調定数', '使用量']].join(tiers)
+    agg = d.groupby(['料金表番号', '区画順', '区画'], as_index=False).agg(調定数=('調定数', 'sum'), 総使用量=('使用量', 'sum'))
+    tot = agg.groupby('料金表番号')[['調定数', '総使用量']].transform('sum')
+    agg['構成比(調定)'] = agg['調定数'] / tot['調定数'].where(tot['調定数'] > 0) * 100
+    agg['構成比(使用量)'] = agg['総使用量'] / tot['総使用量'].where(tot['総使用量'] > 0) * 100
+    return agg
+
+# ---------------------------------------------------------
+# 5. 影響分析（差額 = 新料金 - 現行料金、調定数で加重）
+# ---------------------------------------------------------
+IMPACT_QUANTILES = [0.05, 0.10, 0.25, 0.50, 0.75, 0.90, 0.95, 0.99]
+IMPACT_BAND_EDGES = [-1000, -500, -100, 0, 100, 500, 1000]
+# 値下がり側は「以上〜未満」、値上がり側は「超〜以下」、差額 0 は単独の帯
+IMPACT_BAND_LABELS = ['-1,000円未満', '-1,000円以上〜-500円未満', '-500円以上〜-100円未満', '-100円以上〜0円未満', '0円（変化なし）',
+                      '0円超〜100円以下', '100円超〜500円以下', '500円超〜1,000円以下', '1,000円超']
+IMPACT_TOP_K = 20
+
+def impact_bands(diff):
+    # IMPACT_BAND_LABELS の番号を返す（負は左閉、正は右閉で数え、0 は中央の帯）
+    diff = np.asarray(diff, dtype=float)
+    return np.where(diff < 0, np.searchsorted(IMPACT_BAND_EDGES, diff, side='right'), np.searchsorted(IMPACT_BAND_EDGES, diff, side='left') + 1)
+
+def grouped_weighted_quantiles(values, weights, codes, n_groups, qs):
+    # グループ内で値を昇順に並べ、累積重みが q×合計 に達する最初の値を返す（グループ全体を1回のソートで処理）
+    order = np.lexsort((values, codes))
+    v_s, c_s = values[order], codes[order]
+    cw = np.concatenate([[0.0], np.cumsum(np.clip(weights[order], 0, None))])
+    bounds = np.searchsorted(c_s, np.arange(n_groups + 1), side='left')
+    start, total = cw[bounds[:-1]], cw[bounds[1:]] - cw[bounds[:-1]]
+    targets = start[:, None] + total[:, None] * np.asarray(qs)[None, :]
+    idx = np.searchsorted(cw[1:], targets, side='left')
+    idx = np.clip(idx, bounds[:-1, None], np.maximum(bounds[1:, None] - 1, bounds[:-1, None]))
+    out = v_s[np.minimum(idx, len(v_s) - 1)] if len(v_s) else np.full(targets.shape, np.nan)
+    return np.where(total[:, None] > 0, out, np.nan)
+
+def top_increases(diff, codes, n_groups, top_k):
+    # 差額の降順、同額は行位置の昇順（出力を再現可能にする）で 全体 / グループ別 の上位K件の行位置を返す
+    pos = np.arange(len(diff))
+    k = min(top_k, len(diff))
+    if k:
+        # 全体は部分選択で K 番目の値以上の行だけに絞ってから並べる
+        cand = np.flatnonzero(diff >= np.partition(diff, len(diff) - k)[len(diff) - k])
+        top_all = cand[np.lexsort((cand, -diff[cand]))][:k]
+    else:
+        top_all = pos
+    order = np.lexsort((pos, -diff, codes))
+    bounds = np.searchsorted(codes[order], np.arange(n_groups + 1), side='left')
+    return top_all, [order[bounds[g]:min(bounds[g] + top_k, bounds[g + 1])] for g in range(n_groups)]
+
+def analyze_impact(sim_res, plan_name, top_k=IMPACT_TOP_K):
+    diff = sim_res[f"{plan_name}_差額"].to_numpy(dtype=float)
+    weights = sim_res['調定数'].to_numpy(dtype=float)
+    codes, keys = pd.factorize(sim_res['料金表番号'], sort=True)
+    labels = ['全体'] + [str(k) for k in keys]
+    n_g = len(keys)
+
+    # 分位点（全体 + 料金表番号別）
+    q_all = grouped_weighted_quantiles(diff, weights, np.zeros(len(diff), dtype=int), 1, IMPACT_QUANTILES)
+    q_grp = grouped_weighted_quantiles(diff, weights, codes, n_g, IMPACT_QUANTILES)
+    w_tot = np.concatenate([[weights.sum()], np.bincount(codes, weights=weights, minlength=n_g)])
+    w_diff = np.concatenate([[(diff * weights).sum()], np.bincount(codes, weights=diff * weights, minlength=n_g)])
+    df_q = pd.DataFrame(np.vstack([q_all, q_grp]), columns=[f"P{round(q * 100)}" for q in IMPACT_QUANTILES])
+    df_q.insert(0, '料金表番号', labels)
+    df_q.insert(1, '調定数', w_tot)
+    df_q['平均差額'] = np.divide(w_diff, w_tot, out=np.full(len(w_tot), np.nan), where=w_tot > 0)
+
+    # 差額帯別の調定数
+    nb = len(IMPACT_BAND_LABELS)
+    cnt_grp = np.bincount(codes * nb + impact_bands(diff), weights=weights, minlength=n_g * nb).reshape(n_g, nb)
+    df_b = pd.DataFrame(np.vstack([cnt_grp.sum(axis=0), cnt_grp]), columns=IMPACT_BAND_LABELS)
+    df_b.insert(0, '料金表番号', labels)
+
+    # 値上がり幅の大きい需要家 上位K件（全体・料金表番号別）
+    top_all, top_grp = top_increases(diff, codes, n_g, top_k)
+    picks = [('全体', top_all)] + list(zip(labels[1:], top_grp))
+    plan_cols = {c for c in sim_res.columns if c.endswith('_差額')} | {c[:-len('_差額')] for c in sim_res.columns if c.endswith('_差額')}
+    cols = [c for c in sim_res.columns if c not in plan_cols] + [plan_name, f"{plan_name}_差額"]
+    df_t = pd.concat([sim_res.iloc[pos][cols].assign(区分=lbl, 順位=np.arange(1, len(pos) + 1)) for lbl, pos in picks], ignore_index=True)
+    df_t = df_t[['区分', '順位'] + cols]
+    return {'分位点': df_q, '差額帯': df_b, '上位影響': df_t}
+
+def build_impact_excel(impact):
+    output = io.BytesIO()
+    try:
+        writer = pd.ExcelWriter(output, engine='xlsxwriter')
+    except (ValueError, ImportError):
+        # xlsxwriterが無い場合は openpyxl でフォールバック
+        writer = pd.ExcelWriter(output, engine='openpyxl')
+    with writer:
+        for pn, tables in impact.items():
+            for name, df in tables.items():
+                df.to_excel(writer, index=False, sheet_name=f"{pn}_{name}")
+    return output.getvalue()
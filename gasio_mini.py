@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import numpy as np
+from gasio_common import load_master_xlsx, load_demo_data, assign_tiers, aggregate_tiers
 
 # ---------------------------------------------------------
 # 1. 設定 & デザイン (ロゴカラー修復済)
@@ -49,6 +49,8 @@ def normalize_columns(df):
     return df
 
 def smart_load(file):
+    if str(getattr(file, 'name', '')).lower().endswith('.xlsx'):
+        return load_master_xlsx(file)
     for enc in ['utf-8', 'cp932', 'shift_jis']:
         try:
             file.seek(0)
@@ -58,26 +60,13 @@ def smart_load(file):
         except: continue
     return None
 
-def get_tier_name(usage, tariff_df):
-    if tariff_df.empty: return "Unknown"
-    sorted_df = tariff_df.sort_values('MAX').reset_index(drop=True)
-    applicable = sorted_df[sorted_df['MAX'] >= (usage - 1e-9)]
-    row = applicable.iloc[0] if not applicable.empty else sorted_df.iloc[-1]
-    
-    for col in ['区画名', '区画']:
-        if col in row and pd.notna(row[col]): return str(row[col])
-    
-    rank = row.name + 1
-    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-    return letters[rank-1] if rank <= len(letters) else f"Tier{rank}"
-
 # ---------------------------------------------------------
 # 3. メイン処理 (デモデータ自動生成ロジック追加)
 # ---------------------------------------------------------
 with st.sidebar:
     st.header("📂 Data Import")
     file_usage = st.file_uploader("1. 使用量CSV (実績)", type=['csv'])
-    file_master = st.file_uploader("2. 料金表マスタCSV (定義)", type=['csv'])
+    file_master = st.file_uploader("2. 料金表マスタ (CSV / xlsx)", type=['csv', 'xlsx'])
 
 # 🌟 データ読み込みとデモモードの判定
 df_master = None
@@ -94,16 +83,7 @@ if file_master and file_usage:
 
 if is_demo_mode:
     st.info("💡 CSV未設定のため、デモデータ読込中")
-    # デモ用マスタ
-    df_master = pd.DataFrame({
-        'MIN': [0.0, 8.0, 30.0], 'MAX': [8.0, 30.0, 999999999.0],
-        '基本料金': [1800.0, 2600.0, 5600.0], '単位料金': [550.0, 450.0, 350.0],
-        '料金表番号': [99, 99, 99], '区画': ['A', 'B', 'C']
-    })
-    # デモ用使用量（ガンマ分布を使って、リアルなガス使用量の偏りを再現）
-    np.random.seed(42)
-    demo_usages = np.round(np.random.gamma(shape=2.5, scale=6.0, size=800), 1)
-    df_usage = pd.DataFrame({'使用量': demo_usages, '調定数': 1, '料金表番号': 99})
+    df_master, df_usage = load_demo_data()
 
 if df_usage is not None and df_master is not None:
     # 🌟 デモモード時の警告表示
@@ -116,7 +96,7 @@ if df_usage is not None and df_master is not None:
     if not selected_ids:
         st.stop()
 
-    # 指紋チェック
+    # 指紋チェック（区画構成が同じなら区画別に合算、異なれば料金表番号別に並べて表示）
     fps_check = {}
     for tid in selected_ids:
         m_sub = df_master[df_master['料金表番号'] == tid]
@@ -124,10 +104,7 @@ if df_usage is not None and df_master is not None:
             f = sorted(m_sub['MAX'].unique())
             if f: f[-1] = 999999999.0
             fps_check[tid] = tuple(f)
-    
-    if len(set(fps_check.values())) > 1:
-        st.error("⚠️ 料金表の区画が一致しません。")
-        st.stop()
+    ids_consistent = len(set(fps_check.values())) <= 1
 
     # === 🌟 現行マスタの確認エリア ===
     with st.expander("📋 現行の料金表マスタを確認する", expanded=False):
@@ -146,23 +123,16 @@ if df_usage is not None and df_master is not None:
 
     # 集計
     df_target = df_usage[df_usage['料金表番号'].isin(selected_ids)].copy()
-    master_rep = df_master[df_master['料金表番号'] == selected_ids[0]].sort_values('MAX').reset_index(drop=True)
-    
-    df_target['Current_Tier'] = df_target['使用量'].apply(lambda x: get_tier_name(x, master_rep))
-    
-    agg_df = df_target.groupby('Current_Tier', as_index=False).agg({
-        '調定数': 'sum',
-        '使用量': 'sum'
-    }).rename(columns={'使用量': '総使用量'})
-    
+    tiers = assign_tiers(df_target, df_master[df_master['料金表番号'].isin(selected_ids)])
+    df_target['Current_Tier'] = tiers['区画']
+    agg_by_id = aggregate_tiers(df_target, tiers)
+
+    # 区画別合算（並び順は区画順で固定）
+    agg_df = agg_by_id.groupby(['区画順', '区画'], as_index=False)[['調定数', '総使用量']].sum().rename(columns={'区画': 'Current_Tier'})
+    agg_df = agg_df.sort_values('区画順').drop(columns=['区画順'])
     agg_df['調定数'] = agg_df['調定数'].astype(float)
     agg_df['総使用量'] = agg_df['総使用量'].astype(float)
 
-    # 並び順固定
-    order_list = [get_tier_name(r['MAX']-1e-6, master_rep) for _, r in master_rep.iterrows()]
-    agg_df['order'] = agg_df['Current_Tier'].apply(lambda x: order_list.index(x) if x in order_list else 99)
-    agg_df = agg_df.sort_values('order').drop(columns=['order'])
-
     # --- 表示 ---
     st.markdown("---")
     total_count = agg_df['調定数'].sum()
@@ -174,9 +144,24 @@ if df_usage is not None and df_master is not None:
     if total_count > 0:
         c3.metric("1件あたり平均", f"{total_vol/total_count:.1f} m³")
 
-    if not agg_df.empty and total_count > 0:
+    # plotly はグラフ描画の直前に読込（指標の初回描画を優先）
+    import plotly.express as px
+    chic_colors = ['#88a0b9', '#aab7b8', '#82e0aa', '#f5b7b1', '#d7bde2', '#f9e79f']
+
+    if not agg_df.empty and total_count > 0 and not ids_consistent:
+        st.info(f"💡 区画構成の異なる料金表が混在しているため、料金表番号別（{len(fps_check)}件）に表示しています。")
+        long_df = agg_by_id.melt(id_vars=['料金表番号', '区画順', '区画'], value_vars=['構成比(調定)', '構成比(使用量)'], var_name='指標', value_name='構成比')
+        long_df['料金表番号'] = long_df['料金表番号'].astype(str)
+        fig = px.bar(long_df.sort_values(['料金表番号', '区画順']), x='料金表番号', y='構成比', color='区画', facet_col='指標',
+                     color_discrete_sequence=chic_colors, height=400)
+        fig.update_xaxes(type='category')
+        fig.update_layout(yaxis_title="構成比(%)", margin=dict(l=0, r=0, t=30, b=0))
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(agg_by_id.drop(columns=['区画順']).style.format({
+            '調定数': "{:,.0f}", '総使用量': "{:,.1f}", '構成比(調定)': "{:.1f}%", '構成比(使用量)': "{:.1f}%"
+        }), hide_index=True, use_container_width=True)
+    elif not agg_df.empty and total_count > 0:
         g1, g2 = st.columns(2)
-        chic_colors = ['#88a0b9', '#aab7b8', '#82e0aa', '#f5b7b1', '#d7bde2', '#f9e79f']
         
         with g1:
             fig1 = px.pie(agg_df, values='調定数', names='Current_Tier', hole=0.5, 
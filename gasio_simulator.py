@@ -1,11 +1,10 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
-import io
 import json
 import datetime
+from gasio_common import load_master_xlsx, load_demo_data, validate_tariffs, assign_tiers, aggregate_tiers
+from gasio_common import IMPACT_BAND_LABELS, IMPACT_TOP_K, analyze_impact, build_impact_excel
 
 # ---------------------------------------------------------
 # 1. 設定 & デザイン
@@ -44,6 +43,7 @@ with c_head1:
 
 # --- ステート管理 ---
 if 'simulation_result' not in st.session_state: st.session_state.simulation_result = None
+if 'impact_result' not in st.session_state: st.session_state.impact_result = None
 if 'plan_data' not in st.session_state:
     d_df = pd.DataFrame({'No': [1, 2, 3], '区画名': ['A', 'B', 'C'], '適用上限(m3)': [8.0, 30.0, 99999.0], '単位料金': [500.0, 400.0, 300.0]})
     st.session_state.plan_data = {i: d_df.copy() for i in range(3)} 
@@ -92,6 +92,8 @@ def load_ratemake_format(file, extract_type='master'):
     return None
 
 def smart_load_wrapper(file, file_type='generic'):
+    if str(getattr(file, 'name', '')).lower().endswith('.xlsx'):
+        return load_master_xlsx(file) if file_type == 'master' else None
     df_rm = load_ratemake_format(file, extract_type=file_type)
     if df_rm is not None: return df_rm
     for enc in ['cp932', 'utf-8', 'shift_jis']:
@@ -110,24 +112,56 @@ def calculate_slide_rates(base_a, blocks_df):
         base_fees[c['No']] = base_fees[p['No']] + (p['単位料金'] - c['単位料金']) * p['適用上限(m3)']
     return base_fees
 
-def calculate_bill_single(usage, tariff_df, billing_count=1):
-    if billing_count == 0 or tariff_df.empty: return 0
-    df = tariff_df.copy()
-    if '適用上限(m3)' in df.columns: df = df.rename(columns={'適用上限(m3)':'MAX'})
-    df['MAX'] = pd.to_numeric(df['MAX'], errors='coerce').fillna(999999999.0)
-    target = df[df['MAX'] >= (usage - 1e-9)].sort_values('MAX')
-    row = target.iloc[0] if not target.empty else df.sort_values('MAX').iloc[-1]
-    return int(row.get('基本料金', 0) + (usage * row['単位料金']))
-
-def get_tier_name(usage, tariff_df):
-    if tariff_df.empty: return "Unknown"
-    df = tariff_df.copy()
-    if '適用上限(m3)' in df.columns: df = df.rename(columns={'適用上限(m3)':'MAX'})
-    df['MAX'] = pd.to_numeric(df['MAX'], errors='coerce').fillna(999999999.0)
-    sorted_df = df.sort_values('MAX').reset_index(drop=True)
-    applicable = sorted_df[sorted_df['MAX'] >= (usage - 1e-9)]
-    row = applicable.iloc[0] if not applicable.empty else sorted_df.iloc[-1]
-    return str(row.get('区画名', row.get('区画', row.name + 1)))
+def compile_tariff(tariff_df):
+    # 料金表を MAX 昇順の (MAX, 基本料金, 単位料金) 配列に変換（一括計算用）
+    df = tariff_df.rename(columns={'適用上限(m3)':'MAX'})
+    maxs = pd.to_numeric(df['MAX'], errors='coerce').fillna(999999999.0).to_numpy(dtype=float)
+    bases = pd.to_numeric(df['基本料金'], errors='coerce').fillna(0.0).to_numpy(dtype=float) if '基本料金' in df.columns else np.zeros(len(df))
+    units = pd.to_numeric(df['単位料金'], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    order = np.argsort(maxs, kind='stable')
+    return maxs[order], bases[order], units[order]
+
+def tariff_curve(compiled, x_max):
+    # 区画の両端だけで料金カーブを構成（折れ点は厳密、境界の段差は同じ x に2点を置いて表現）
+    maxs, bases, units = compiled
+    if len(maxs) == 0: return np.array([]), np.array([])
+    lo = np.concatenate([[0.0], maxs[:-1]])
+    hi = maxs.copy(); hi[-1] = max(hi[-1], x_max)
+    keep = lo < x_max
+    lo, hi = lo[keep], np.minimum(hi[keep], x_max)
+    xs = np.column_stack([lo, hi]).ravel()
+    ys = np.repeat(bases[keep], 2) + xs * np.repeat(units[keep], 2)
+    # 連続な境界の重複点は除外
+    dup = np.concatenate([[False], (np.diff(xs) == 0) & (np.abs(np.diff(ys)) < 1e-9)])
+    return xs[~dup], ys[~dup]
+
+@st.cache_data(show_spinner=False)
+def compile_master(df_master):
+    return {tid: compile_tariff(g) for tid, g in df_master.groupby('料金表番号')}
+
+def calculate_bills(usages, compiled, billing_counts=None):
+    # 「MAX >= 使用量」の最初の区画を適用（超過時は最終区画）、料金は小数点以下切り捨て
+    usages = np.asarray(usages, dtype=float)
+    if compiled is None or len(compiled[0]) == 0: return np.zeros(len(usages), dtype=int)
+    maxs, bases, units = compiled
+    idx = np.minimum(np.searchsorted(maxs, usages - 1e-9, side='left'), len(maxs) - 1)
+    bills = (bases[idx] + usages * units[idx]).astype(int)
+    if billing_counts is not None: bills = np.where(np.asarray(billing_counts) == 0, 0, bills)
+    return bills
+
+def calculate_bills_by_tariff(df_usage, compiled_master):
+    bills = np.zeros(len(df_usage), dtype=int)
+    for tid, pos in df_usage.groupby('料金表番号').indices.items():
+        sub = df_usage.iloc[pos]
+        bills[pos] = calculate_bills(sub['使用量'], compiled_master.get(tid), sub['調定数'])
+    return bills
+
+@st.cache_resource(show_spinner=False)
+def warm_up():
+    # プロセス起動後の初回のみ実行：デモデータ生成と料金表コンパイルを先に済ませておく
+    df_m, _ = load_demo_data()
+    compile_master(df_m)
+    return True
 
 # ---------------------------------------------------------
 # 3. サイドバー & データロード (デモデータ自動生成ロジック追加)
@@ -145,7 +179,7 @@ with st.sidebar:
     
     st.markdown("---")
     file_usage = st.file_uploader("1. 使用量CSV", type=['csv'], key="u")
-    file_master = st.file_uploader("2. 料金表マスタCSV", type=['csv'], key="m")
+    file_master = st.file_uploader("2. 料金表マスタ (CSV / xlsx)", type=['csv', 'xlsx'], key="m")
     
     # 🌟 データ読み込みとデモモードの判定
     df_master_all = None
@@ -165,32 +199,49 @@ with st.sidebar:
 
     if is_demo_mode:
         st.info("💡 CSV未設定のため、デモデータ読込中")
-        # デモ用マスタ
-        df_master_all = pd.DataFrame({
-            'MIN': [0.0, 8.0, 30.0], 'MAX': [8.0, 30.0, 999999999.0],
-            '基本料金': [1800.0, 2600.0, 5600.0], '単位料金': [550.0, 450.0, 350.0],
-            '料金表番号': [99, 99, 99], '区画': ['A', 'B', 'C']
-        })
-        # デモ用使用量（ガンマ分布を使って、リアルなガス使用量の偏りを再現）
-        np.random.seed(42)
-        demo_usages = np.round(np.random.gamma(shape=2.5, scale=6.0, size=800), 1)
-        df_usage = pd.DataFrame({'使用量': demo_usages, '調定数': 1, '料金表番号': 99})
+        df_master_all, df_usage = load_demo_data()
         selected_ids = [99]
 
     st.markdown("---")
     save_json_data = json.dumps({'plan_data': {k: v.to_dict(orient='records') for k, v in st.session_state.plan_data.items()}, 'base_a': st.session_state.base_a}, indent=2, ensure_ascii=False)
     st.download_button("💾 設定保存(.json)", save_json_data, f"gasio_config_{datetime.datetime.now().strftime('%Y%m%d')}.json")
 
+warm_up()
+
 # ---------------------------------------------------------
 # 4. メインエリア
 # ---------------------------------------------------------
 if df_usage is not None and df_master_all is not None and selected_ids:
+    # plotly はグラフを描く場合のみ読込
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     df_target_usage = df_usage[df_usage['料金表番号'].isin(selected_ids)].copy()
     
     # 🌟 デモモード時の警告表示
     if is_demo_mode:
         st.warning("🚀 **現在デモモードで動作中**：デモデータでシミュレーションしています。ご自身のデータを分析するには、左のサイドバーから「使用量CSV」と「マスタCSV」をアップロードしてください。")
 
+    new_plans = {}
+    for i in range(3):
+        if not st.session_state.plan_data[i].empty:
+            curr_plan = st.session_state.plan_data[i]
+            bases = calculate_slide_rates(st.session_state.base_a[i], curr_plan)
+            res_df = pd.DataFrame([{"区画名":r['区画名'], "MIN":0.0, "MAX":r['適用上限(m3)'], "基本料金":bases.get(r['No'],0), "単位料金":r['単位料金']} for _, r in curr_plan.iterrows()])
+            new_plans[f"Plan_{i+1}"] = res_df
+
+    # === 料金表の整合性チェック（現行マスタ + 全プランを一括検証） ===
+    master_sel = df_master_all[df_master_all['料金表番号'].isin(selected_ids)]
+    chk_all = pd.concat([master_sel[['料金表番号', 'MAX', '基本料金', '単位料金']]] + [p_df.assign(料金表番号=pn)[['料金表番号', 'MAX', '基本料金', '単位料金']] for pn, p_df in new_plans.items()], ignore_index=True)
+    max_by_id = df_target_usage.groupby('料金表番号')['使用量'].max().to_dict()
+    max_by_id.update({pn: df_target_usage['使用量'].max() for pn in new_plans})
+    chk_all['検証'] = validate_tariffs(chk_all, max_by_id).to_numpy()
+    issues = chk_all.loc[chk_all['検証'] != '', '料金表番号'].value_counts(sort=False)
+    if not issues.empty:
+        st.warning("⚠️ 料金表の整合性に問題があります：" + "、".join(f"{k} ({n}行)" for k, n in issues.items()) + "（該当行は「検証」列を確認してください）")
+    master_checks = chk_all['検証'].iloc[:len(master_sel)].set_axis(master_sel.index)
+    plan_checks = {pn: g['検証'].tolist() for pn, g in chk_all.iloc[len(master_sel):].groupby('料金表番号', sort=False)}
+
     # === 現行マスタの確認エリア ===
     with st.expander("📋 現行の料金表マスタを確認する（比較用）", expanded=False):
         st.markdown("現在選択されている料金表マスタです。新しいプランを設計する際の基準としてご覧ください。")
@@ -198,9 +249,9 @@ if df_usage is not None and df_master_all is not None and selected_ids:
         for idx, t_id in enumerate(selected_ids):
             with master_cols[idx % 3]:
                 st.markdown(f"**【料金表番号: {t_id}】**")
-                target_df = df_master_all[df_master_all['料金表番号'] == t_id].copy()
+                target_df = master_sel[master_sel['料金表番号'] == t_id].assign(検証=master_checks)
                 st.dataframe(
-                    target_df[['MIN', 'MAX', '基本料金', '単位料金']].style.format({
+                    target_df[['MIN', 'MAX', '基本料金', '単位料金', '検証']].style.format({
                         "MIN": "{:,.1f}", "MAX": "{:,.1f}", "基本料金": "¥{:,.2f}", "単位料金": "¥{:,.2f}"
                     }), hide_index=True, use_container_width=True
                 )
@@ -210,27 +261,33 @@ if df_usage is not None and df_master_all is not None and selected_ids:
     with tab_design:
         st.markdown("##### 📊 料金プラン一括比較 & 設計")
 
-        new_plans = {}
-        for i in range(3):
-            if not st.session_state.plan_data[i].empty:
-                curr_plan = st.session_state.plan_data[i]
-                bases = calculate_slide_rates(st.session_state.base_a[i], curr_plan)
-                res_df = pd.DataFrame([{"区画名":r['区画名'], "MIN":0.0, "MAX":r['適用上限(m3)'], "基本料金":bases.get(r['No'],0), "単位料金":r['単位料金']} for _, r in curr_plan.iterrows()])
-                new_plans[f"Plan_{i+1}"] = res_df
-
         sum_cols = st.columns(3)
         for i, (p_name, p_df) in enumerate(new_plans.items()):
             with sum_cols[i]:
                 st.markdown(f"**{p_name}**")
                 st.dataframe(p_df.style.format({"MIN": "{:,.1f}", "MAX": "{:,.1f}", "基本料金": "¥{:,.0f}", "単位料金": "¥{:,.2f}"}), hide_index=True, use_container_width=True)
 
-        st.markdown("###### 📈 料金カーブ比較 (0〜50m3)")
-        compare_df = pd.DataFrame({"使用量": list(range(0, 51, 2))})
-        for p_name, p_df in new_plans.items():
-            compare_df[p_name] = compare_df["使用量"].apply(lambda v: calculate_bill_single(v, p_df))
-        
-        fig = px.line(compare_df, x="使用量", y=list(new_plans.keys()), height=300, color_discrete_sequence=['#3498db', '#e74c3c', '#2ecc71'])
-        fig.update_layout(yaxis_title="ガス料金(円)", legend_title="プラン", margin=dict(l=0, r=0, t=10, b=0))
+        # 表示上限は最上位の折れ点（最終区画の上限は開放扱い）と使用量実績まで選択可能
+        compiled_plans = {p_name: compile_tariff(p_df) for p_name, p_df in new_plans.items()}
+        compiled_cur = compile_master(master_sel)
+        breaks = np.concatenate([c[0][:-1] for c in list(compiled_plans.values()) + list(compiled_cur.values())] + [[0.0]])
+        range_top = float(np.ceil(max(50.0, breaks.max() * 1.5, df_target_usage['使用量'].max()) / 10) * 10)
+        cc1, cc2 = st.columns([2, 1])
+        x_max = cc1.slider("表示範囲 上限 (m3)", min_value=10.0, max_value=range_top, value=min(50.0, range_top), step=5.0, key="curve_xmax")
+        cur_tid = cc2.selectbox("重ねる現行料金表", [t for t in selected_ids if t in compiled_cur], key="curve_tid")
+
+        st.markdown(f"###### 📈 料金カーブ比較 (0〜{x_max:,.0f}m3)")
+        fig = go.Figure()
+        dens = df_target_usage.loc[df_target_usage['使用量'] <= x_max]
+        fig.add_trace(go.Histogram(x=dens['使用量'], y=dens['調定数'], histfunc='sum', nbinsx=50, name="使用量分布", marker_color=COLOR_CURRENT, opacity=0.25, yaxis='y2'))
+        if cur_tid is not None:
+            cx, cy = tariff_curve(compiled_cur[cur_tid], x_max)
+            fig.add_trace(go.Scatter(x=cx, y=cy, mode='lines', name=f"現行({cur_tid})", line=dict(color=COLOR_BAR, dash='dash')))
+        for p_name, color in zip(compiled_plans, ['#3498db', '#e74c3c', '#2ecc71']):
+            xs, ys = tariff_curve(compiled_plans[p_name], x_max)
+            fig.add_trace(go.Scatter(x=xs, y=ys, mode='lines+markers', name=p_name, line=dict(color=color), marker=dict(size=5)))
+        fig.update_layout(height=320, xaxis_title="使用量(m3)", yaxis_title="ガス料金(円)", legend_title="プラン", margin=dict(l=0, r=0, t=10, b=0),
+                          yaxis2=dict(title="調定数", overlaying='y', side='right', showgrid=False))
         st.plotly_chart(fig, use_container_width=True)
 
         st.markdown("---")
@@ -254,8 +311,10 @@ if df_usage is not None and df_master_all is not None and selected_ids:
                             st.session_state.plan_data[i].iloc[-1, 2] = 99999.0
                             st.rerun()
                 with c2:
-                    edited = st.data_editor(st.session_state.plan_data[i], use_container_width=True, key=f"ed_plan_{i}", 
-                                           column_config={"No": st.column_config.NumberColumn(disabled=True), "区画名": st.column_config.TextColumn("🖋️ 区画名"), "適用上限(m3)": st.column_config.NumberColumn("🖋️ 適用上限", format="%.1f"), "単位料金": st.column_config.NumberColumn("🖋️ 単位料金", format="%.4f")})
+                    plan_view = st.session_state.plan_data[i].assign(検証=plan_checks.get(f"Plan_{i+1}", ''))
+                    edited = st.data_editor(plan_view, use_container_width=True, key=f"ed_plan_{i}", 
+                                           column_config={"No": st.column_config.NumberColumn(disabled=True), "区画名": st.column_config.TextColumn("🖋️ 区画名"), "適用上限(m3)": st.column_config.NumberColumn("🖋️ 適用上限", format="%.1f"), "単位料金": st.column_config.NumberColumn("🖋️ 単位料金", format="%.4f"), "検証": st.column_config.TextColumn("⚠️ 検証", disabled=True)})
+                    edited = edited.drop(columns=['検証'])
                     if not edited.equals(st.session_state.plan_data[i]):
                         st.session_state.plan_data[i] = edited
                         st.rerun()
@@ -265,11 +324,14 @@ if df_usage is not None and df_master_all is not None and selected_ids:
         if st.button("🚀 計算実行", key="calc_run", type="primary"):
             with st.spinner("Calculating..."):
                 res = df_target_usage.copy()
-                res['現行料金'] = res.apply(lambda r: calculate_bill_single(r['使用量'], df_master_all[df_master_all['料金表番号']==r['料金表番号']], r['調定数']), axis=1)
+                res['現行料金'] = calculate_bills_by_tariff(res, compile_master(df_master_all))
+                impact = {}
                 for pn, pdf in new_plans.items():
-                    res[pn] = res.apply(lambda r: calculate_bill_single(r['使用量'], pdf, r['調定数']), axis=1)
+                    res[pn] = calculate_bills(res['使用量'], compile_tariff(pdf), res['調定数'])
                     res[f"{pn}_差額"] = res[pn] - res['現行料金']
+                    impact[pn] = analyze_impact(res, pn)
                 st.session_state.simulation_result = res
+                st.session_state.impact_result = {'tables': impact, 'excel': build_impact_excel(impact)}
         
         if st.session_state.simulation_result is not None:
             sr = st.session_state.simulation_result
@@ -289,6 +351,21 @@ if df_usage is not None and df_master_all is not None and selected_ids:
             with gc2: st.plotly_chart(px.scatter(sr.sample(min(len(sr),1000)), x='使用量', y=['現行料金', sel_p], title="新旧料金プロット(1000件)", opacity=0.6), use_container_width=True)
             st.dataframe(pd.DataFrame(summ_list).style.format({"売上総額":"¥{:,.0f}","差額":"¥{:,.0f}","増減率":"{:.2f}%"}), hide_index=True, use_container_width=True)
 
+            impact = st.session_state.impact_result
+            if impact is not None and sel_p in impact['tables']:
+                imp = impact['tables'][sel_p]
+                st.markdown("---")
+                st.markdown(f"###### 📑 需要家影響分析：{sel_p}（調定数加重）")
+                q_cols = [c for c in imp['分位点'].columns if c.startswith('P')] + ['平均差額']
+                st.markdown("**差額の分位点**")
+                st.dataframe(imp['分位点'].style.format({**{c: "¥{:,.0f}" for c in q_cols}, "調定数": "{:,.0f}"}), hide_index=True, use_container_width=True)
+                st.markdown("**差額帯別 調定数**")
+                st.dataframe(imp['差額帯'].style.format({c: "{:,.0f}" for c in IMPACT_BAND_LABELS}), hide_index=True, use_container_width=True)
+                st.markdown(f"**値上がり幅 上位{IMPACT_TOP_K}件（全体・料金表番号別）**")
+                st.dataframe(imp['上位影響'].style.format({"現行料金": "¥{:,.0f}", sel_p: "¥{:,.0f}", f"{sel_p}_差額": "¥{:+,.0f}"}), hide_index=True, use_container_width=True)
+                st.download_button("📥 影響分析をExcelでダウンロード（全プラン）", impact['excel'], f"gasio_impact_{datetime.datetime.now().strftime('%Y%m%d')}.xlsx",
+                                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="dl_impact")
+
     with tab_analysis:
         st.markdown("##### 需要構成分析")
         sel_p = st.selectbox("比較対象", list(new_plans.keys()), key="s_p_a")
@@ -296,22 +373,39 @@ if df_usage is not None and df_master_all is not None and selected_ids:
         for tid in fps: 
             l = list(fps[tid]); l[-1] = 999999999.0; fps[tid] = tuple(l)
         ids_consistent = (len(set(fps.values())) <= 1)
+
+        # 現行区画は各行を自分の料金表番号のマスタで一括判定
+        tiers_c = assign_tiers(df_target_usage, master_sel)
+        df_target_usage['現行区画'] = tiers_c['区画']
+        agg_by_id = aggregate_tiers(df_target_usage, tiers_c)
         
         g1, g2 = st.columns(2)
         with g1:
             st.markdown("**Current: 現行構成**")
             if ids_consistent:
-                m_rep = df_master_all[df_master_all['料金表番号'] == selected_ids[0]].sort_values('MAX').reset_index(drop=True)
-                df_target_usage['現行区画'] = df_target_usage['使用量'].apply(lambda x: get_tier_name(x, m_rep))
-                agg_c = df_target_usage.groupby('現行区画').agg(件数=('調定数','sum'), 使用量=('使用量','sum')).reset_index()
+                agg_c = agg_by_id.groupby(['区画順', '区画'], as_index=False)[['調定数', '総使用量']].sum().sort_values('区画順')
+                agg_c = agg_c.drop(columns=['区画順']).rename(columns={'区画': '現行区画', '調定数': '件数', '総使用量': '使用量'})
                 st.plotly_chart(px.pie(agg_c, values='件数', names='現行区画', hole=0.5, color_discrete_sequence=CHIC_PIE_COLORS), use_container_width=True)
                 st.dataframe(agg_c.style.format({"使用量":"{:,.1f}"}), hide_index=True, use_container_width=True)
             else:
-                st.info("⚠️ 異なる区画の料金表が混在しているため、分布図を表示")
-                st.plotly_chart(px.histogram(df_target_usage, x="使用量", color="料金表番号", nbins=50, color_discrete_sequence=CHIC_PIE_COLORS), use_container_width=True)
+                st.info(f"💡 異なる区画の料金表が混在しているため、料金表番号別（{len(fps)}件）に表示")
+                # 構成比のグラフは下段（全幅・調定/使用量の2面）に1つだけ表示し、ここは料金表番号別の集計表
+                st.dataframe(agg_by_id.drop(columns=['区画順']).style.format({
+                    '調定数': "{:,.0f}", '総使用量': "{:,.1f}", '構成比(調定)': "{:.1f}%", '構成比(使用量)': "{:.1f}%"
+                }), hide_index=True, use_container_width=True)
         with g2:
             st.markdown(f"**Proposal: {sel_p}構成**")
-            df_target_usage['新区画'] = df_target_usage['使用量'].apply(lambda x: get_tier_name(x, new_plans[sel_p]))
+            tiers_n = assign_tiers(df_target_usage.assign(料金表番号=0), new_plans[sel_p].assign(料金表番号=0))
+            df_target_usage['新区画'] = tiers_n['区画']
             agg_n = df_target_usage.groupby('新区画').agg(件数=('調定数','sum'), 使用量=('使用量','sum')).reset_index()
             st.plotly_chart(px.pie(agg_n, values='件数', names='新区画', hole=0.5, color_discrete_sequence=CHIC_PIE_COLORS), use_container_width=True)
             st.dataframe(agg_n.style.format({"件数":"{:,.0f}", "使用量":"{:,.1f}"}), hide_index=True, use_container_width=True)
+
+        if not ids_consistent:
+            st.markdown("**料金表番号別 現行区画構成**")
+            long_df = agg_by_id.melt(id_vars=['料金表番号', '区画順', '区画'], value_vars=['構成比(調定)', '構成比(使用量)'], var_name='指標', value_name='構成比')
+            fig_f = px.bar(long_df.sort_values(['料金表番号', '区画順']).astype({'料金表番号': str}), x='料金表番号', y='構成比', color='区画', facet_col='指標',
+                           color_discrete_sequence=CHIC_PIE_COLORS, height=400)
+            fig_f.update_xaxes(type='category')
+            fig_f.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+            st.plotly_chart(fig_f, use_container_width=True)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# アプリ・共通モジュールはリポジトリ直下に置かれているため、import できるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from gasio_common import aggregate_tiers, assign_tiers
+
+
+def test_int_max_master():
+    master = pd.DataFrame({'料金表番号': [10, 10, 10], 'MAX': [8, 30, 999999], '区画': ['A', 'B', 'C']})
+    usage = pd.DataFrame({'料金表番号': [10, 10, 10, 10], '使用量': [0.0, 8.0, 8.1, 50.0]})
+    tiers = assign_tiers(usage, master)
+    assert tiers['区画'].tolist() == ['A', 'A', 'B', 'C']
+    assert tiers['区画順'].tolist() == [1, 1, 2, 3]
+
+
+def test_float_id_master_int_id_usage():
+    master = pd.DataFrame({'料金表番号': [10.0, 10.0], 'MAX': [8.0, 999999999.0], '区画': ['A', 'B']})
+    usage = pd.DataFrame({'料金表番号': [10, 10], '使用量': [5, 20]})
+    assert assign_tiers(usage, master)['区画'].tolist() == ['A', 'B']
+
+
+def test_string_ids_use_own_master():
+    master = pd.DataFrame({
+        '料金表番号': ['A1', 'A1', 'B2', 'B2'], 'MAX': [8.0, 99999.0, 10.0, 99999.0], '区画': ['A', 'B', 'X', 'Y'],
+    })
+    usage = pd.DataFrame({'料金表番号': ['A1', 'B2', 'A1', 'C3', np.nan], '使用量': [8.05, 8.05, 3.0, 1.0, 1.0]})
+    tiers = assign_tiers(usage, master)
+    assert tiers['区画'].tolist() == ['B', 'X', 'A', 'Unknown', 'Unknown']
+    assert tiers['区画順'].tolist() == [2, 1, 1, 99, 99]
+
+
+def test_aggregate_shares_within_each_tariff():
+    master = pd.DataFrame({'料金表番号': [1, 1, 2, 2], 'MAX': [10.0, 999.0, 20.0, 999.0]})
+    usage = pd.DataFrame({'料金表番号': [1, 1, 1, 2], '使用量': [5.0, 15.0, 25.0, 30.0], '調定数': [1.0, 1.0, 2.0, 3.0]})
+    agg = aggregate_tiers(usage, assign_tiers(usage, master))
+    assert agg[['料金表番号', '区画', '調定数']].values.tolist() == [[1, 'A', 1.0], [1, 'B', 3.0], [2, 'B', 3.0]]
+    assert agg['構成比(調定)'].tolist() == [25.0, 75.0, 100.0]
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gasio_common import IMPACT_BAND_LABELS, IMPACT_QUANTILES, analyze_impact, grouped_weighted_quantiles, impact_bands
+
+
+def brute_quantile(values, weights, q):
+    # 昇順に並べて累積重みが q×合計 に達する最初の値
+    order = np.argsort(values, kind='stable')
+    v, w = values[order], np.clip(weights[order], 0, None)
+    total = w.sum()
+    if total <= 0: return np.nan
+    cum = np.cumsum(w)
+    return v[np.argmax(cum >= q * total)]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_grouped_weighted_quantiles_match_brute_force(seed):
+    rng = np.random.RandomState(seed)
+    n, n_g = rng.randint(1, 60), rng.randint(1, 5)
+    values = rng.randint(-5, 6, n).astype(float) * 100  # 同額を多く含める
+    weights = rng.randint(0, 4, n).astype(float)
+    codes = rng.randint(0, n_g, n)
+    qs = IMPACT_QUANTILES + [0.0, 1.0]
+    got = grouped_weighted_quantiles(values, weights, codes, n_g, qs)
+    for g in range(n_g):
+        sel = codes == g
+        expected = [brute_quantile(values[sel], weights[sel], q) for q in qs]
+        np.testing.assert_array_equal(got[g], expected)
+
+
+def test_bands_give_zero_its_own_band():
+    diff = [-1500, -1000, -501, -500, -100, -1, 0, 1, 100, 101, 500, 1000, 1001]
+    labels = [IMPACT_BAND_LABELS[b] for b in impact_bands(diff)]
+    assert labels == [
+        '-1,000円未満', '-1,000円以上〜-500円未満', '-1,000円以上〜-500円未満', '-500円以上〜-100円未満',
+        '-100円以上〜0円未満', '-100円以上〜0円未満', '0円（変化なし）', '0円超〜100円以下', '0円超〜100円以下',
+        '100円超〜500円以下', '100円超〜500円以下', '500円超〜1,000円以下', '1,000円超',
+    ]
+
+
+def test_top_k_ties_break_on_row_position():
+    sim_res = pd.DataFrame({
+        '料金表番号': [1, 2, 1, 1, 2, 1, 2],
+        '調定数': 1,
+        '現行料金': 1000,
+        '案1': 0,
+        '案1_差額': [50, 80, 80, 50, 80, 50, 10],
+    })
+    sim_res['行'] = range(len(sim_res))
+    top = analyze_impact(sim_res, '案1', top_k=3)['上位影響']
+    assert top.loc[top['区分'] == '全体', '行'].tolist() == [1, 2, 4]
+    assert top.loc[top['区分'] == '1', '行'].tolist() == [2, 0, 3]
+    assert top.loc[top['区分'] == '2', '行'].tolist() == [1, 4, 6]
+    # 入力順を変えても同額の並びは行位置どおりで決まる
+    rev = analyze_impact(sim_res.iloc[::-1].reset_index(drop=True), '案1', top_k=3)['上位影響']
+    assert rev.loc[rev['区分'] == '全体', '行'].tolist() == [4, 2, 1]
+
+
+def test_band_counts_are_weighted():
+    sim_res = pd.DataFrame({'料金表番号': [1, 1, 2], '調定数': [2, 3, 4], '現行料金': 0, '案1': 0, '案1_差額': [0, 0, 150]})
+    bands = analyze_impact(sim_res, '案1')['差額帯'].set_index('料金表番号')
+    assert bands.loc['全体', '0円（変化なし）'] == 5
+    assert bands.loc['2', '100円超〜500円以下'] == 4
+    assert bands.loc['全体'].sum() == 9
@@ -0,0 +1,52 @@
+import io
+import os
+
+import openpyxl
+import pytest
+
+from gasio_common import read_master_xlsx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLED = os.path.join(ROOT, 'G-Calc_master.xlsx')
+
+
+def workbook_bytes(sheets):
+    wb = openpyxl.Workbook(write_only=True)
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        for r in rows: ws.append(r)
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def test_bundled_workbook_reads_current_master():
+    with open(BUNDLED, 'rb') as f:
+        df = read_master_xlsx(f.read())
+    assert df['区画'].tolist() == ['A', 'B', 'C']
+    assert df['MAX'].tolist() == [8.0, 30.0, 999999.0]
+    assert df['単位料金'].tolist() == pytest.approx([493.04, 418.04, 343.04])
+    assert set(df['料金表番号']) == {10}
+
+
+def test_bundled_workbook_without_ratemake_sheet_is_rejected():
+    # 「変更内容」シートは 基本料金/基準単位料金/基本料金/調整単位料金 の並びで MIN/MAX 見出しが無い
+    wb = openpyxl.load_workbook(BUNDLED)
+    del wb['レートメイク']
+    out = io.BytesIO()
+    wb.save(out)
+    assert read_master_xlsx(out.getvalue()) is None
+
+
+def test_header_labels_are_required():
+    rows = [[None, '基本料金', '基準単位料金', '基本料金', '調整単位料金'], [None, 1200, 550, 1080, 493.04]]
+    assert read_master_xlsx(workbook_bytes({'Sheet': rows})) is None
+
+
+def test_multi_tariff_sheets():
+    sheets = {}
+    for t in [11, 12]:
+        sheets[f'レートメイク_{t}'] = [['x'], [None, 'MIN', 'MAX', '基本', '調整単位']] + [[None, i * 10, (i + 1) * 10, 1000 + i, 500 - i] for i in range(30)]
+    df = read_master_xlsx(workbook_bytes(sheets))
+    assert df.groupby('料金表番号').size().to_dict() == {11: 30, 12: 30}
+    assert df['区画'].iloc[-1] == 'T30'
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from gasio_common import validate_tariffs
+
+
+def test_flags_each_rule_per_tariff():
+    df = pd.DataFrame({
+        '料金表番号': [1, 1, 1, 'P', 'P', 'P', 2],
+        'MAX': [8, 30, 999, 8, 5, 50, None],
+        '基本料金': [1800, 2600, 5600, 1000, 1000, -1, 1],
+        '単位料金': [550, 450, 350, 500, 600, 400, 1],
+    })
+    msgs = validate_tariffs(df, {1: 20, 'P': 100, 2: 5}).tolist()
+    assert msgs == [
+        '', '', '',
+        '',
+        '上限が昇順でない / 単位料金が上昇 / 境界で料金が不連続',
+        '境界で料金が不連続 / 料金が負または未入力 / 最大使用量を未カバー',
+        '料金が負または未入力',
+    ]
+
+
+def test_coverage_skipped_without_max_usage():
+    # gasio_calc の編集表（使用量データなし）は「適用上限(m3)」列のまま検証する
+    df = pd.DataFrame({'料金表番号': 0, '適用上限(m3)': [8.0, 30.0], '基本料金': [1500.0, 2300.0], '単位料金': [650.0, 550.0]})
+    assert validate_tariffs(df).tolist() == ['', '']